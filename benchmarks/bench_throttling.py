@@ -0,0 +1,54 @@
+"""
+Memory benchmark for TokenBucketThrottle
+
+Feeds millions of distinct keys into a throttle and prints the traced memory
+after every batch. With a bounded table the numbers stay flat once `max_keys`
+buckets are tracked. The last batches use 10 KB keys, which are stored as
+fixed-size digests and so take no more memory than short ones.
+
+run with `python -m benchmarks.bench_throttling` from the project root
+"""
+import time
+import tracemalloc
+
+from routers.throttling import TokenBucketThrottle
+
+
+TOTAL_KEYS = 3_000_000
+BATCH = 500_000
+MAX_KEYS = 10_000
+LONG_KEYS = 200_000
+LONG_KEY_PREFIX = "x" * 10_000
+
+
+def main():
+    throttle = TokenBucketThrottle(capacity=5, refill_rate=5 / 60, max_keys=MAX_KEYS)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    for batch_start in range(0, TOTAL_KEYS, BATCH):
+        for i in range(batch_start, batch_start + BATCH):
+            throttle.allow(f"user{i}")
+        report(throttle, f"{batch_start + BATCH:>9} keys")
+
+    elapsed = time.perf_counter() - started
+    print(f"{TOTAL_KEYS / elapsed:,.0f} attempts/s (with tracemalloc on)")
+
+    for batch_start in range(0, LONG_KEYS, LONG_KEYS // 2):
+        for i in range(batch_start, batch_start + LONG_KEYS // 2):
+            throttle.allow(f"{LONG_KEY_PREFIX}{i}")
+        report(throttle, f"{batch_start + LONG_KEYS // 2:>9} long keys")
+
+    tracemalloc.stop()
+
+
+def report(throttle: TokenBucketThrottle, label: str):
+    current, peak = tracemalloc.get_traced_memory()
+    stats = throttle.stats()
+    print(f"{label} | tracked {stats['tracked_keys']:>6} | evicted {stats['evicted']:>9} | "
+          f"current {current / 1024:8.1f} KiB | peak {peak / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
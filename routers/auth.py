@@ -1,13 +1,15 @@
+import math
 import os
 from datetime import timedelta, datetime, timezone
 from typing import Dict, Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from jose import jwt, JWTError
 
 from models.temp_db import DataBaseManager
 from routers.security import verify_password, get_password_hash
+from routers.throttling import TokenBucketThrottle
 
 """
 THe flow is as follows:
@@ -34,6 +36,39 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")  # for token authentication
 
+# Throttling of /login and /register, checked before any password is hashed
+USERNAME_ATTEMPTS_BURST = int(os.getenv("USERNAME_ATTEMPTS_BURST", "5"))
+USERNAME_ATTEMPTS_PER_MINUTE = float(os.getenv("USERNAME_ATTEMPTS_PER_MINUTE", "5"))
+CLIENT_ATTEMPTS_BURST = int(os.getenv("CLIENT_ATTEMPTS_BURST", "20"))
+CLIENT_ATTEMPTS_PER_MINUTE = float(os.getenv("CLIENT_ATTEMPTS_PER_MINUTE", "30"))
+THROTTLE_MAX_KEYS = int(os.getenv("THROTTLE_MAX_KEYS", "10000"))
+
+username_throttle = TokenBucketThrottle(
+    capacity=USERNAME_ATTEMPTS_BURST,
+    refill_rate=USERNAME_ATTEMPTS_PER_MINUTE / 60,
+    max_keys=THROTTLE_MAX_KEYS,
+)
+client_throttle = TokenBucketThrottle(
+    capacity=CLIENT_ATTEMPTS_BURST,
+    refill_rate=CLIENT_ATTEMPTS_PER_MINUTE / 60,
+    max_keys=THROTTLE_MAX_KEYS,
+)
+
+
+def check_attempt_allowed(request: Request, username: str):
+    """
+    Reject the request with 429 if the client or the username is out of attempts
+    """
+    client = request.client.host if request.client else "unknown"
+
+    for throttle, key in ((client_throttle, client), (username_throttle, username)):
+        if not throttle.allow(key):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(math.ceil(throttle.retry_after(key)))},
+            )
+
 
 async def get_current_user(
         token: str = Depends(oauth2_scheme      # automatically extracts the token from the request
@@ -64,7 +99,7 @@ async def get_current_user(
 
 
 @router.post("/login")
-async def authenticate_user_and_return_token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def authenticate_user_and_return_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Authenticate user and return JWT token
 
@@ -72,6 +107,8 @@ async def authenticate_user_and_return_token(form_data: OAuth2PasswordRequestFor
     - username: the user identifier
     - password: the user password (if applicable)
     """
+    check_attempt_allowed(request, form_data.username)
+
     db = DataBaseManager()
 
     # user must be fetched from the database
@@ -138,6 +175,7 @@ async def hash_password(password: str):
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register_user(
+        request: Request,
         name: str,
         email: str,
         password: str,
@@ -147,6 +185,8 @@ async def register_user(
     """
     Register a new user with hashed password
     """
+    check_attempt_allowed(request, name)
+
     db = DataBaseManager()
 
     # Check if user already exists
@@ -178,6 +218,17 @@ async def register_user(
     }
 
 
+@router.get("/throttle-stats")
+async def throttle_stats(current_user = Depends(get_current_user)):     # only authenticated users can see the counters
+    """
+    Counters of the /login and /register throttles, for monitoring
+    """
+    return {
+        "username": username_throttle.stats(),
+        "client": client_throttle.stats(),
+    }
+
+
 # not used currently, but could be useful for debugging or token validation
 @router.get("/verify-token")
 async def verify_token(token: str):
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Tuple
+
+
+class TokenBucketThrottle:
+    """
+    Token-bucket rate limiter keyed by an arbitrary string (username, client IP, ...)
+
+    Every key gets a bucket holding up to `capacity` tokens which refills at
+    `refill_rate` tokens per second. Each attempt takes one token; an attempt
+    against an empty bucket is rejected.
+
+    The buckets live in a table of at most `max_keys` entries, keyed by a fixed-size
+    digest of the key, so memory stays constant no matter how many distinct keys are
+    seen or how long they are. When the table is full, a bucket that has fully
+    refilled is evicted first (its state is the same as a fresh bucket, so nothing is
+    lost). Only the `eviction_scan` least recently used buckets are checked; if none
+    of them has refilled, the least recently used bucket is evicted anyway. In that
+    case the evicted key comes back with a full bucket, so flooding the table with
+    enough distinct keys can reset the limit of a throttled key. The client-IP
+    throttle keeps a single source from doing this cheaply.
+    """
+
+    def __init__(
+            self,
+            capacity: int,
+            refill_rate: float,
+            max_keys: int = 10_000,
+            eviction_scan: int = 32,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        if capacity < 1 or refill_rate <= 0 or max_keys < 1 or eviction_scan < 1:
+            raise ValueError("capacity, refill_rate, max_keys and eviction_scan must be positive")
+
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self.eviction_scan = eviction_scan
+        self._clock = clock
+        self._buckets: "OrderedDict[bytes, Tuple[float, float]]" = OrderedDict()   # digest -> (tokens, last update)
+        self._lock = Lock()
+
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+        self.evicted_throttled = 0      # evicted before they had refilled
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        """Fixed-size table key, so long client-supplied strings are never stored"""
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def _tokens(self, entry: Tuple[float, float], now: float) -> float:
+        tokens, stamp = entry
+        return min(self.capacity, tokens + (now - stamp) * self.refill_rate)
+
+    def _evict(self, now: float):
+        """Drop a refilled bucket if one is found among the oldest, else the oldest one"""
+        for i, (digest, entry) in enumerate(self._buckets.items()):
+            if i >= self.eviction_scan:
+                break
+            if self._tokens(entry, now) >= self.capacity:
+                del self._buckets[digest]
+                self.evicted += 1
+                return
+
+        self._buckets.popitem(last=False)
+        self.evicted += 1
+        self.evicted_throttled += 1
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until the bucket for `key` holds a whole token again"""
+        with self._lock:
+            entry = self._buckets.get(self._digest(key))
+            if entry is None:
+                return 0.0
+            tokens = self._tokens(entry, self._clock())
+            return max(0.0, (1 - tokens) / self.refill_rate)
+
+    def allow(self, key: str) -> bool:
+        """Take one token for `key`; return False if its bucket is empty"""
+        digest = self._digest(key)
+        now = self._clock()
+
+        with self._lock:
+            entry = self._buckets.get(digest)
+            if entry is None:
+                tokens = float(self.capacity)
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+            else:
+                tokens = self._tokens(entry, now)
+                self._buckets.move_to_end(digest)
+
+            if tokens >= 1:
+                self._buckets[digest] = (tokens - 1, now)
+                self.allowed += 1
+                return True
+
+            self._buckets[digest] = (tokens, now)
+            self.rejected += 1
+            return False
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self.allowed = 0
+            self.rejected = 0
+            self.evicted = 0
+            self.evicted_throttled = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evicted": self.evicted,
+                "evicted_throttled": self.evicted_throttled,
+                "tracked_keys": len(self._buckets),
+                "max_keys": self.max_keys,
+            }
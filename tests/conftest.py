@@ -0,0 +1,10 @@
+import pytest
+
+from routers.auth import client_throttle, username_throttle
+
+
+@pytest.fixture(autouse=True)
+def reset_throttles():
+    # Every test starts with full login buckets
+    client_throttle.reset()
+    username_throttle.reset()
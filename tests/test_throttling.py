@@ -0,0 +1,176 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models.temp_db import DataBaseManager
+from models.models import User
+from routers import auth
+from routers.auth import client_throttle, username_throttle
+from routers.security import get_password_hash
+from routers.throttling import TokenBucketThrottle
+
+
+# --------------------------------------------------------------------------------------
+# Fixtures
+# --------------------------------------------------------------------------------------
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def database():
+    # Reset the database and add a known user
+    DataBaseManager._initialized = False
+    db = DataBaseManager()
+    db.users_db.clear()
+    db.users_db.append(User(
+        id=1,
+        name="testuser",
+        age=30,
+        city="Boston",
+        email="test@example.com",
+        password_hash=get_password_hash("testpass123")
+    ))
+    return db.users_db
+
+
+# --------------------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------------------
+def test_bucket_rejects_when_empty_and_refills(clock):
+    throttle = TokenBucketThrottle(capacity=2, refill_rate=1, clock=clock)
+
+    assert throttle.allow("alice")
+    assert throttle.allow("alice")
+    assert not throttle.allow("alice")
+    assert throttle.retry_after("alice") == pytest.approx(1)
+
+    clock.now += 1
+    assert throttle.allow("alice")
+    assert throttle.stats()["allowed"] == 3
+    assert throttle.stats()["rejected"] == 1
+
+
+def test_buckets_are_per_key(clock):
+    throttle = TokenBucketThrottle(capacity=1, refill_rate=1, clock=clock)
+
+    assert throttle.allow("alice")
+    assert not throttle.allow("alice")
+    assert throttle.allow("bob")
+
+
+def test_table_is_bounded_and_evicts_least_recently_used(clock):
+    throttle = TokenBucketThrottle(capacity=1, refill_rate=1, max_keys=2, clock=clock)
+
+    throttle.allow("a")
+    throttle.allow("b")
+    throttle.allow("a")             # "a" is now the most recently used
+    throttle.allow("c")             # nothing has refilled, evicts "b"
+
+    stats = throttle.stats()
+    assert stats["tracked_keys"] == 2
+    assert stats["evicted"] == 1
+    assert stats["evicted_throttled"] == 1
+    assert not throttle.allow("a")  # "a" kept its empty bucket
+
+
+def test_refilled_bucket_is_evicted_before_throttled_one(clock):
+    throttle = TokenBucketThrottle(capacity=2, refill_rate=1, max_keys=2, clock=clock)
+
+    throttle.allow("target")
+    throttle.allow("target")
+    assert not throttle.allow("target")
+    throttle.allow("idle")
+
+    clock.now += 1                  # "idle" has refilled, "target" (the oldest) has not
+    throttle.allow("flood")         # evicts "idle", not "target"
+
+    assert throttle.stats()["evicted_throttled"] == 0
+    assert throttle.allow("target")
+    assert not throttle.allow("target")
+
+
+def test_long_keys_are_stored_as_fixed_size_digests(clock):
+    throttle = TokenBucketThrottle(capacity=1, refill_rate=1, clock=clock)
+    long_key = "x" * 1_000_000
+
+    assert throttle.allow(long_key)
+    assert not throttle.allow(long_key)
+    assert all(len(digest) == 16 for digest in throttle._buckets)
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        TokenBucketThrottle(capacity=0, refill_rate=1)
+
+
+def test_login_throttled_per_username_before_hashing(client, database, monkeypatch):
+    calls = []
+    monkeypatch.setattr(auth, "verify_password", lambda *args: calls.append(args) or False)
+
+    login_data = {"username": "testuser", "password": "wrong"}
+    for _ in range(username_throttle.capacity):
+        assert client.post("/auth/login", data=login_data).status_code == 401
+
+    response = client.post("/auth/login", data=login_data)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert len(calls) == username_throttle.capacity
+
+    # Another username from the same client is still allowed
+    response = client.post("/auth/login", data={"username": "otheruser", "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_login_throttled_per_client(client, database):
+    for i in range(client_throttle.capacity):
+        response = client.post("/auth/login", data={"username": f"nobody{i}", "password": "x"})
+        assert response.status_code == 401
+
+    response = client.post("/auth/login", data={"username": "nobody", "password": "x"})
+    assert response.status_code == 429
+
+
+def test_register_throttled_before_hashing(client, database, monkeypatch):
+    # Use up the tokens of a new username through /login
+    for _ in range(username_throttle.capacity):
+        assert client.post("/auth/login", data={"username": "newuser", "password": "x"}).status_code == 401
+
+    calls = []
+    monkeypatch.setattr(auth, "get_password_hash", lambda password: calls.append(password))
+
+    params = {"name": "newuser", "email": "new@example.com", "password": "p", "age": 30, "city": "Sofia"}
+    response = client.post("/auth/register", params=params)
+    assert response.status_code == 429
+    assert calls == []
+    assert all(user.name != "newuser" for user in database)
+
+
+def test_throttle_stats_requires_auth(client, database):
+    assert client.get("/auth/throttle-stats").status_code == 401
+
+    response = client.post("/auth/login", data={"username": "testuser", "password": "testpass123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = client.get("/auth/throttle-stats", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["username"]["allowed"] == 1
+    assert data["client"]["tracked_keys"] == 1
+
+
+# run with `pytest` in the terminal